@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import argparse
 import copy
+import os
 import shutil
 import xml.etree.ElementTree as ET
+from bisect import bisect_left
 from pathlib import Path
 from typing import Dict, Optional
 
@@ -15,7 +17,7 @@ from tune_pipeline.nuggets_extract import extract_nuggets, extract_assemblies
 from tune_pipeline.validate_teacher import validate_teacher
 from tune_pipeline.xml_split_hands import HandSplitResult, split_by_staff
 from tune_pipeline.xml_simplify import simplify_part_for_dsp2
-from tune_pipeline.nuggets_extract import _apply_clef_heuristic_to_xml
+from tune_pipeline.nuggets_extract import _apply_clef_heuristic_to_xml, _measures_by_number
 from tune_pipeline.xml_to_midi import write_midi
 
 
@@ -31,9 +33,12 @@ def _set_staff_number(part: stream.Part, number: int) -> None:
 
 
 def _merge_part_into(base: stream.Part, other: stream.Part) -> None:
+    # One pass over base instead of a base.measure() scan per merged measure
+    base_measures = _measures_by_number(base)
+    numbered = any(m.number for m in base_measures.values())
     # Iterate measures in other part
     for measure_other in other.getElementsByClass(stream.Measure):
-        measure_base = base.measure(measure_other.number)
+        measure_base = base_measures.get(measure_other.number)
         if measure_base:
             for element in measure_other.elements:
                 # Insert element into base measure at the same offset
@@ -41,17 +46,18 @@ def _merge_part_into(base: stream.Part, other: stream.Part) -> None:
         else:
             # If measure doesn't exist in base (unlikely for matched parts), insert it
             base.insert(measure_other.offset, measure_other)
+            if numbered:
+                base_measures.setdefault(measure_other.number, measure_other)
 
 
 def _get_piano_parts(score: stream.Score) -> list[stream.Part]:
     piano_parts = []
     for part in score.parts:
         # Check instrument
-        if part.getInstrument(returnDefault=False):
-            inst = part.getInstrument(returnDefault=False)
-            if isinstance(inst, instrument.Piano):
-                piano_parts.append(part)
-                continue
+        inst = part.getInstrument(returnDefault=False)
+        if isinstance(inst, instrument.Piano):
+            piano_parts.append(part)
+            continue
         # Check name
         part_name = (part.partName or "").lower()
         if "piano" in part_name:
@@ -114,7 +120,7 @@ def _write_musicxml(score: stream.Score, path: Path) -> Path:
     return path
 
 
-def _process_track(output_dir: Path, base_name: str, suffix: str, part: stream.Part, note_sequences: Dict[str, Dict[str, object]], tracks: Dict[str, Dict[str, object]]) -> None:
+def _process_track(output_dir: Path, base_name: str, suffix: str, part: stream.Part, note_sequences: Dict[str, Dict[str, object]], tracks: Dict[str, Dict[str, object]], write_hand_xml: bool = True) -> None:
     # Create a temporary score for the part to write it
     score = stream.Score()
     score.insert(0, part)
@@ -124,7 +130,7 @@ def _process_track(output_dir: Path, base_name: str, suffix: str, part: stream.P
     ns_name = f"{base_name}.{suffix}.ns.json" if suffix else f"{base_name}.ns.json"
     xml_name = f"{base_name}.{suffix}.xml" if suffix else f"{base_name}.xml" # Optional, mainly for RH/LH debugging
     
-    if suffix:
+    if suffix and write_hand_xml:
          # Write XML for debugging/completeness for separated parts
         _write_musicxml(score, output_dir / xml_name)
 
@@ -154,8 +160,6 @@ def _process_track(output_dir: Path, base_name: str, suffix: str, part: stream.P
 
 def _create_skeleton_score(metadata: Dict[str, object]) -> stream.Score:
     """Creates a minimal score with time/tempo info for nugget extraction."""
-    from music21 import meter, tempo, note as m21note
-    
     score = stream.Score()
     part = stream.Part()
     score.insert(0, part)
@@ -179,13 +183,15 @@ def _create_skeleton_score(metadata: Dict[str, object]) -> stream.Score:
     num_measures = metadata.get("assumedMeasuresFromTotalTime", 100)
     
     # Create measures with proper duration (filled with rests)
-    # This ensures music21 calculates correct offsets for each measure
+    # Offsets are known up front, so insert without per-append bookkeeping
+    # and update the part's caches once at the end
     for m_num in range(1, num_measures + 1):
         m = stream.Measure(number=m_num)
         r = m21note.Rest()
         r.quarterLength = measure_duration
         m.append(r)
-        part.append(m)
+        part.coreInsert((m_num - 1) * measure_duration, m)
+    part.coreElementsChanged()
     
     return score
 
@@ -208,19 +214,22 @@ def _score_from_note_sequence(ns: Dict[str, object], metadata: Dict[str, object]
     if tempos[0].get("time", 0.0) > 0:
         tempos.insert(0, {"time": 0.0, "qpm": float(default_qpm)})
 
+    # Tempo segments: segment k starts at segment_times[k] with segment_ql[k]
+    # quarters elapsed and runs at segment_qpm[k]. Built once so each lookup
+    # is a bisection instead of a walk over every earlier tempo change.
+    change_times = [float(entry.get("time", 0.0)) for entry in tempos[1:]]
+    segment_times = [0.0]
+    segment_ql = [0.0]
+    segment_qpm = [float(tempos[0].get("qpm", default_qpm))]
+    for entry, change_time in zip(tempos[1:], change_times):
+        segment_ql.append(segment_ql[-1] + (change_time - segment_times[-1]) * (segment_qpm[-1] / 60.0))
+        segment_times.append(change_time)
+        segment_qpm.append(float(entry.get("qpm", segment_qpm[-1])))
+
     def seconds_to_ql(seconds: float) -> float:
-        ql = 0.0
-        prev_time = 0.0
-        current_qpm = float(tempos[0].get("qpm", default_qpm))
-        for entry in tempos[1:]:
-            change_time = float(entry.get("time", 0.0))
-            if seconds <= change_time:
-                break
-            ql += (change_time - prev_time) * (current_qpm / 60.0)
-            prev_time = change_time
-            current_qpm = float(entry.get("qpm", current_qpm))
-        ql += (seconds - prev_time) * (current_qpm / 60.0)
-        return ql
+        # A change exactly at `seconds` does not apply yet
+        k = bisect_left(change_times, seconds)
+        return segment_ql[k] + (seconds - segment_times[k]) * (segment_qpm[k] / 60.0)
 
     for entry in tempos:
         t = float(entry.get("time", 0.0))
@@ -261,8 +270,13 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
     if not tune_folder.exists():
         raise PipelineError(f"Folder not found: {tune_folder}")
     
+    # One directory listing answers every input lookup below
+    with os.scandir(tune_folder) as entries:
+        input_names = [entry.name for entry in entries if entry.is_file()]
+    input_name_set = set(input_names)
+
     teacher_path = tune_folder / "teacher.json"
-    if not teacher_path.exists():
+    if teacher_path.name not in input_name_set:
         raise PipelineError(f"Missing file: {teacher_path.name}")
     
     teacher = read_json(teacher_path)
@@ -276,16 +290,19 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
     
     # Check inputs
     tune_xml = tune_folder / "tune.xml"
-    tune_ns_candidates = list(tune_folder.glob("*.ns.json"))
+    tune_ns_candidates = [tune_folder / name for name in input_names if name.endswith(".ns.json")]
     
     settings = teacher.get("pipelineSettings", {})
+    metadata = settings.get("metadata", {})
+    # The app loads tune.rh.xml / tune.lh.xml, so only skip them when asked to
+    write_hand_xml = settings.get("emitHandXml", True)
     dsp_settings = settings.get("dsp", {})
     grid = float(dsp_settings.get("gridQuarterLength", 0.25))
     chord_cap_value = dsp_settings.get("chordCap", 6)
     chord_cap = int(chord_cap_value) if chord_cap_value is not None else None
 
     # Priority: XML -> NS
-    if tune_xml.exists():
+    if tune_xml.name in input_name_set:
         # --- XML PATH ---
         base_name = tune_xml.stem
 
@@ -333,12 +350,11 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
         # 5. Process Output (MIDI -> NS)
         note_sequences: Dict[str, Dict[str, object]] = {}
         tracks: Dict[str, Dict[str, object]] = {}
-        
+
         for suffix, part in parts_to_process:
-            _process_track(output_dir, base_name, suffix, part, note_sequences, tracks)
+            _process_track(output_dir, base_name, suffix, part, note_sequences, tracks, write_hand_xml)
             
         combined_part_for_nuggets = combined_part
-        metadata = settings.get("metadata", {})
 
         # DSP XML (cleaned from XML)
         for track_name, part in parts_by_track.items():
@@ -361,10 +377,10 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
         # Identify source NS
         # Prefer 'tune.ns.json', then '{folder}.ns.json', then first found
         src_ns_path = tune_folder / "tune.ns.json"
-        if not src_ns_path.exists():
+        if src_ns_path.name not in input_name_set:
             # Try folder name
             folder_ns = tune_folder / f"{tune_folder.name}.ns.json"
-            if folder_ns.exists():
+            if folder_ns.name in input_name_set:
                 src_ns_path = folder_ns
             else:
                 src_ns_path = tune_ns_candidates[0]
@@ -388,8 +404,6 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
         parts_by_track = {}
         
         # Build score from NS and use as XML input
-        metadata = settings.get("metadata", {})
-        
         if not metadata:
              print("Warning: No metadata in teacher.json for NS-derived score.")
 
@@ -421,7 +435,7 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
             teacher["nuggets"],
             note_sequences,
             parts_by_track=parts_by_track,
-            metadata=settings.get("metadata", {}),
+            metadata=metadata,
             grid=grid,
             chord_cap=chord_cap,
         )
@@ -436,7 +450,7 @@ def build_tune(tune_folder: Path) -> Dict[str, object]:
             teacher["nuggets"],
             note_sequences,
             parts_by_track=parts_by_track,
-            metadata=settings.get("metadata", {}),
+            metadata=metadata,
             grid=grid,
             chord_cap=chord_cap,
         )
@@ -453,13 +467,15 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Tune pipeline CLI")
     subparsers = parser.add_subparsers(dest="command", required=True)
     build_parser = subparsers.add_parser("build", help="Build tune artifacts")
-    build_parser.add_argument("tune_folder", type=Path)
+    # Several folders can be built in one process, paying music21 startup once
+    build_parser.add_argument("tune_folder", type=Path, nargs="+")
     args = parser.parse_args()
     if args.command == "build":
-        summary = build_tune(args.tune_folder)
-        print("Build summary:")
-        for key, value in summary.items():
-            print(f"- {key}: {value}")
+        for tune_folder in args.tune_folder:
+            summary = build_tune(tune_folder)
+            print("Build summary:" if len(args.tune_folder) == 1 else f"Build summary ({tune_folder}):")
+            for key, value in summary.items():
+                print(f"- {key}: {value}")
 
 
 if __name__ == "__main__":
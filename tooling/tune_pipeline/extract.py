@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import argparse
+from bisect import bisect_right
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 
 from music21 import converter, stream, tempo
 
@@ -16,10 +17,7 @@ class ExtractionError(RuntimeError):
     pass
 
 
-def _note_duration_seconds(
-    element: stream.Music21Object, default_qpm: float
-) -> float:
-    mark = element.getContextByClass(tempo.MetronomeMark)
+def _mark_qpm(mark: Optional[tempo.MetronomeMark], default_qpm: float) -> float:
     qpm = default_qpm
     if mark is not None:
         try:
@@ -32,10 +30,90 @@ def _note_duration_seconds(
             qpm = float(mark.number)
     if qpm <= 0:
         qpm = default_qpm
+    return qpm
+
+
+def _note_duration_seconds(
+    element: stream.Music21Object, default_qpm: float
+) -> float:
+    mark = element.getContextByClass(tempo.MetronomeMark)
+    return _duration_seconds(element, _mark_qpm(mark, default_qpm))
+
+
+def _duration_seconds(element: stream.Music21Object, qpm: float) -> float:
     quarter_length = float(element.duration.quarterLength)
     return quarter_length * 60.0 / qpm
 
 
+def _nesting_depth(element: stream.Music21Object, container: stream.Stream) -> int:
+    depth = 0
+    site = element.activeSite
+    while site is not None and site is not container:
+        depth += 1
+        site = site.activeSite
+    return depth
+
+
+def _tempo_map(
+    container: stream.Stream, default_qpm: float, recurse: bool = True
+) -> Tuple[List[float], List[float]]:
+    # Every tempo mark in the container, ordered by offset, resolved to qpm
+    # once so notes can look up the mark in effect by bisection. At equal
+    # offsets the most deeply nested mark sorts last, so it wins the lookup
+    # the same way it does in getContextByClass.
+    elements = container.recurse() if recurse else container.iter()
+    marks = sorted(
+        (
+            (
+                float(mark.getOffsetInHierarchy(container)),
+                _nesting_depth(mark, container),
+                index,
+                mark,
+            )
+            for index, mark in enumerate(elements.getElementsByClass(tempo.MetronomeMark))
+        ),
+        key=lambda entry: entry[:3],
+    )
+    offsets = [offset for offset, _, _, _ in marks]
+    qpms = [_mark_qpm(mark, default_qpm) for _, _, _, mark in marks]
+    return offsets, qpms
+
+
+def _qpm_at(
+    tempo_map: Tuple[List[float], List[float]], offset: float
+) -> Optional[float]:
+    offsets, qpms = tempo_map
+    index = bisect_right(offsets, offset) - 1
+    return qpms[index] if index >= 0 else None
+
+
+_TempoMaps = Dict[Tuple[int, bool], Tuple[List[float], List[float]]]
+
+
+def _qpm_in_part(
+    element: stream.Music21Object,
+    part: stream.Part,
+    tempo_maps: _TempoMaps,
+    default_qpm: float,
+) -> Tuple[Optional[float], float]:
+    # Search outwards like getContextByClass: marks directly in the note's own
+    # container first, then each enclosing container's whole subtree up to the
+    # part. Returns the qpm found (None if none) and the note's part offset.
+    site = element.activeSite
+    offset = float(element.offset)
+    recurse = False
+    while True:
+        key = (id(site), recurse)
+        if key not in tempo_maps:
+            tempo_maps[key] = _tempo_map(site, default_qpm, recurse=recurse)
+        qpm = _qpm_at(tempo_maps[key], offset)
+        if qpm is not None or site is part:
+            return qpm, offset
+        offset += float(site.offset)
+        site = site.activeSite
+        recurse = True
+
+
 def remove_ghost_notes(
     score: stream.Score,
     threshold_seconds: float = DEFAULT_GHOST_THRESHOLD_SECONDS,
@@ -44,8 +122,24 @@ def remove_ghost_notes(
     notes = list(score.recurse().notes)
     total = len(notes)
     removed = 0
+    # Like getContextByClass: the mark in effect inside the note's part,
+    # else the latest mark placed directly on the score
+    score_tempo_map = _tempo_map(score, default_qpm, recurse=False)
+    part_of_note: Dict[int, stream.Part] = {}
+    tempo_maps: _TempoMaps = {}
+    for part in score.parts:
+        for element in part.recurse().notes:
+            part_of_note[id(element)] = part
     for element in notes:
-        duration_seconds = _note_duration_seconds(element, default_qpm)
+        part = part_of_note.get(id(element))
+        if part is None:
+            duration_seconds = _note_duration_seconds(element, default_qpm)
+        else:
+            qpm, offset = _qpm_in_part(element, part, tempo_maps, default_qpm)
+            if qpm is None:
+                score_offset = float(score.elementOffset(part)) + offset
+                qpm = _qpm_at(score_tempo_map, score_offset)
+            duration_seconds = _duration_seconds(element, default_qpm if qpm is None else qpm)
         if duration_seconds < threshold_seconds:
             site = element.activeSite
             if site is not None:
@@ -4,14 +4,48 @@ import json
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# With orjson, output has the stdlib layout (2-space indent, sorted keys,
+# trailing newline) and parses back to the same values, but the bytes are
+# not always the same: non-ASCII text is written as raw UTF-8 instead of
+# \uXXXX escapes, exponents are shortened (1e20, 1e-7 rather than 1e+20,
+# 1e-07), NaN and Infinity become null, non-str dict keys raise
+# TypeError instead of being coerced, and numpy float32 values keep their
+# own short repr where the stdlib fallback widens them to double.
+_ORJSON_WRITE_OPTIONS = (
+    orjson.OPT_INDENT_2
+    | orjson.OPT_SORT_KEYS
+    | orjson.OPT_APPEND_NEWLINE
+    | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None
+    else 0
+)
+
+
+def _json_default(value: Any) -> Any:
+    # Mirror orjson's OPT_SERIALIZE_NUMPY so both backends accept numpy scalars
+    # and arrays, without importing numpy here
+    if type(value).__module__ == "numpy" and hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 
 def read_json(path: Path) -> Any:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
     with path.open("r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
 def write_json(path: Path, payload: Any) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(payload, option=_ORJSON_WRITE_OPTIONS))
+        return
     with path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, indent=2, sort_keys=True)
+        json.dump(payload, handle, indent=2, sort_keys=True, default=_json_default)
         handle.write("\n")
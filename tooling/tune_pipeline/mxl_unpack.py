@@ -1,23 +1,28 @@
 from __future__ import annotations
 
+import shutil
 import zipfile
 from pathlib import Path
 from xml.etree import ElementTree
 
 
+_COPY_CHUNK_SIZE = 1 << 20
+
+
 class MxlError(RuntimeError):
     pass
 
 
 def _find_rootfile(zf: zipfile.ZipFile) -> str:
     try:
-        container = zf.read("META-INF/container.xml")
+        container = zf.open("META-INF/container.xml")
     except KeyError as exc:
         raise MxlError("Missing META-INF/container.xml in MXL archive") from exc
-    root = ElementTree.fromstring(container)
-    for elem in root.iter():
-        if elem.tag.endswith("rootfile") and "full-path" in elem.attrib:
-            return elem.attrib["full-path"]
+    with container:
+        # Stop at the first rootfile instead of building the whole tree
+        for _, elem in ElementTree.iterparse(container, events=("start",)):
+            if elem.tag.endswith("rootfile") and "full-path" in elem.attrib:
+                return elem.attrib["full-path"]
     raise MxlError("Unable to locate rootfile in container.xml")
 
 
@@ -29,8 +34,17 @@ def unpack_mxl(mxl_path: Path, xml_path: Path) -> Path:
     with zipfile.ZipFile(mxl_path, "r") as zf:
         rootfile = _find_rootfile(zf)
         try:
-            data = zf.read(rootfile)
+            source = zf.open(rootfile)
         except KeyError as exc:
             raise MxlError(f"Rootfile {rootfile} missing in archive") from exc
-    xml_path.write_bytes(data)
+        # Decompress straight into the target instead of holding the whole score in memory.
+        # "xb" never truncates a file someone else wrote, so cleanup only removes our own.
+        with source, xml_path.open("xb") as target:
+            try:
+                shutil.copyfileobj(source, target, _COPY_CHUNK_SIZE)
+            except Exception:
+                # A partial file would be picked up as already unpacked next time
+                target.close()
+                xml_path.unlink(missing_ok=True)
+                raise
     return xml_path
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 import xml.etree.ElementTree as ET
@@ -9,6 +11,7 @@ from pydantic import BaseModel
 
 import copy
 
+from tune_pipeline.io import write_json
 from tune_pipeline.xml_simplify import simplify_part_for_dsp2
 
 class NuggetExtractError(RuntimeError):
@@ -22,44 +25,81 @@ def _global_offset(element: stream.Music21Object, parent: stream.Stream) -> floa
         return float(element.offset)
 
 
+_CONTEXT_CLASSES = (tempo.MetronomeMark, meter.TimeSignature, key.KeySignature)
+
+# Offsets of a part's tempo, meter and key marks, in part.recurse() order
+_ContextIndex = Dict[type, List[Tuple[float, Any]]]
+
+
+def _context_index(part: stream.Part) -> _ContextIndex:
+    # Walk the part once per class for all slices instead of once per slice.
+    return {
+        cls: [(_global_offset(elem, part), elem) for elem in part.recurse().getElementsByClass(cls)]
+        for cls in _CONTEXT_CLASSES
+    }
+
+
 def _last_element_before(
-    part: stream.Part,
-    cls: type,
+    elements: List[Tuple[float, stream.Music21Object]],
     offset: float
 ) -> Optional[stream.Music21Object]:
     last_elem = None
     last_offset = None
-    for elem in part.recurse().getElementsByClass(cls):
-        elem_offset = _global_offset(elem, part)
+    for elem_offset, elem in elements:
         if elem_offset < offset and (last_offset is None or elem_offset > last_offset):
             last_elem = elem
             last_offset = elem_offset
     return last_elem
 
 
+@dataclass
+class _MeasureTable:
+    measures: List[Tuple[stream.Measure, float, float]]
+    offsets: List[float]
+    # Running max of measure ends; everything before bisect_right(reach, x) ends by x
+    reach: List[float]
+
+
+def _measure_table(part: stream.Part) -> _MeasureTable:
+    measures: List[Tuple[stream.Measure, float, float]] = []
+    reach: List[float] = []
+    for measure in part.getElementsByClass(stream.Measure):
+        measure_offset = _global_offset(measure, part)
+        measure_end = measure_offset + measure.duration.quarterLength
+        measures.append((measure, measure_offset, measure_end))
+        reach.append(max(reach[-1], measure_end) if reach else measure_end)
+    return _MeasureTable(measures, [offset for _, offset, _ in measures], reach)
+
+
 def _slice_part_by_offset(
     part: stream.Part,
     start_offset: float,
-    end_offset: float
+    end_offset: float,
+    context: Optional[_ContextIndex] = None,
+    measure_table: Optional[_MeasureTable] = None,
 ) -> stream.Part:
     sliced_part = stream.Part()
     sliced_part.partName = "Piano"
     sliced_part.insert(0.0, instrument.Piano())
 
     # Preserve relevant context at the slice start
-    for cls in (tempo.MetronomeMark, meter.TimeSignature, key.KeySignature):
-        last_elem = _last_element_before(part, cls, start_offset)
+    if context is None:
+        context = _context_index(part)
+    for cls in _CONTEXT_CLASSES:
+        last_elem = _last_element_before(context[cls], start_offset)
         if last_elem is not None:
             sliced_part.insert(0.0, copy.deepcopy(last_elem))
-        for elem in part.recurse().getElementsByClass(cls):
-            elem_offset = _global_offset(elem, part)
+        for elem_offset, elem in context[cls]:
             if start_offset <= elem_offset < end_offset:
                 sliced_part.insert(elem_offset - start_offset, copy.deepcopy(elem))
 
+    if measure_table is None:
+        measure_table = _measure_table(part)
+    lo = bisect_right(measure_table.reach, start_offset)
+    hi = bisect_left(measure_table.offsets, end_offset)
+
     next_measure_number = 1
-    for measure in part.getElementsByClass(stream.Measure):
-        measure_offset = _global_offset(measure, part)
-        measure_end = measure_offset + measure.duration.quarterLength
+    for measure, measure_offset, measure_end in measure_table.measures[lo:hi]:
         if measure_end <= start_offset or measure_offset >= end_offset:
             continue
 
@@ -227,12 +267,7 @@ def _tempo_boundaries(score: stream.Score) -> List[Tuple[float, Optional[float],
     return output
 
 
-def _tempos_for_slice(
-    score: stream.Score,
-    boundaries: List[Tuple[float, Optional[float], float]],
-    start_offset: float,
-    end_offset: float
-) -> List[Dict[str, float]]:
+def _tempo_marks(score: stream.Score) -> List[Tuple[float, float]]:
     marks: List[Tuple[float, float]] = []
     for mark in score.recurse().getElementsByClass(tempo.MetronomeMark):
         offset = _global_offset(mark, score)
@@ -241,37 +276,38 @@ def _tempos_for_slice(
     if not marks:
         marks = [(0.0, 120.0)]
     marks.sort(key=lambda item: item[0])
+    return marks
 
-    last_before = None
-    in_range: List[Tuple[float, float]] = []
-    for offset, qpm in marks:
-        if offset < start_offset:
-            last_before = (offset, qpm)
-            continue
-        if start_offset <= offset < end_offset:
-            in_range.append((offset, qpm))
 
-    selected: List[Tuple[float, float]] = []
-    if last_before is not None:
-        selected.append(last_before)
-    selected.extend(in_range)
+def _slice_range(marks: List[Tuple[Any, ...]], start_offset: float, end_offset: float) -> slice:
+    """Marks in effect for a slice: the last one before it plus those inside.
+
+    `marks` must be sorted by offset (first item).
+    """
+    lo = bisect_left(marks, start_offset, key=lambda mark: mark[0])
+    hi = bisect_left(marks, end_offset, lo=lo, key=lambda mark: mark[0])
+    return slice(max(lo - 1, 0), hi)
+
+
+def _tempos_for_slice(
+    marks: List[Tuple[float, float]],
+    seconds_map: _SecondsMap,
+    start_offset: float,
+    end_offset: float
+) -> List[Dict[str, float]]:
+    selected = marks[_slice_range(marks, start_offset, end_offset)]
     if not selected:
         selected = [(start_offset, 120.0)]
 
-    start_seconds = _offset_to_seconds(start_offset, boundaries)
+    start_seconds = _offset_to_seconds(start_offset, seconds_map)
     tempos = []
     for offset, qpm in selected:
-        t = _offset_to_seconds(offset, boundaries) - start_seconds
+        t = _offset_to_seconds(offset, seconds_map) - start_seconds
         tempos.append({"time": float(max(0.0, t)), "qpm": float(qpm)})
     return tempos
 
 
-def _time_signatures_for_slice(
-    part: stream.Part,
-    boundaries: List[Tuple[float, Optional[float], float]],
-    start_offset: float,
-    end_offset: float
-) -> List[Dict[str, float]]:
+def _time_signature_marks(part: stream.Part) -> List[Tuple[float, int, int]]:
     signatures: List[Tuple[float, int, int]] = []
     for ts in part.recurse().getElementsByClass(meter.TimeSignature):
         offset = _global_offset(ts, part)
@@ -279,27 +315,23 @@ def _time_signatures_for_slice(
     if not signatures:
         signatures = [(0.0, 4, 4)]
     signatures.sort(key=lambda item: item[0])
+    return signatures
 
-    last_before = None
-    in_range: List[Tuple[float, int, int]] = []
-    for offset, numerator, denominator in signatures:
-        if offset < start_offset:
-            last_before = (offset, numerator, denominator)
-            continue
-        if start_offset <= offset < end_offset:
-            in_range.append((offset, numerator, denominator))
 
-    selected: List[Tuple[float, int, int]] = []
-    if last_before is not None:
-        selected.append(last_before)
-    selected.extend(in_range)
+def _time_signatures_for_slice(
+    signatures: List[Tuple[float, int, int]],
+    seconds_map: _SecondsMap,
+    start_offset: float,
+    end_offset: float
+) -> List[Dict[str, float]]:
+    selected = signatures[_slice_range(signatures, start_offset, end_offset)]
     if not selected:
         selected = [(start_offset, 4, 4)]
 
-    start_seconds = _offset_to_seconds(start_offset, boundaries)
+    start_seconds = _offset_to_seconds(start_offset, seconds_map)
     time_signatures = []
     for offset, numerator, denominator in selected:
-        t = _offset_to_seconds(offset, boundaries) - start_seconds
+        t = _offset_to_seconds(offset, seconds_map) - start_seconds
         time_signatures.append(
             {
                 "time": float(max(0.0, t)),
@@ -310,59 +342,144 @@ def _time_signatures_for_slice(
     return time_signatures
 
 
-def _measure_offset(part: stream.Part, measure_number: int, beat: float) -> float:
-    # music21 measure() can return a Stream if multiple measures match, or None
-    # We want the specific measure object at that number.
-    measure = part.measure(measure_number)
-    if measure is None:
+def _measures_by_number(part: stream.Part) -> Dict[int, stream.Measure]:
+    # Same lookup rules as Stream.measure(): the first measure wins for a
+    # repeated number, and unnumbered parts are addressed by position.
+    measures = list(part.getElementsByClass(stream.Measure))
+    if not any(m.number for m in measures):
+        return {i + 1: m for i, m in enumerate(measures)}
+    index: Dict[int, stream.Measure] = {}
+    for m in measures:
+        index.setdefault(m.number, m)
+    return index
+
+
+def _measure_index(part: stream.Part) -> Dict[int, Tuple[float, float]]:
+    # measure number -> (offset, beat length), resolved once per part so each
+    # nugget bound is a dict lookup instead of a part.measure() search.
+    first_time_sig = part.recurse().getElementsByClass("TimeSignature").first()
+    # Carry each measure's time signature forward to the measures after it;
+    # before the first one (or when signatures sit on the part itself) use
+    # the part's first signature.
+    active_time_sig: Dict[int, Any] = {}
+    current = None
+    for measure in part.getElementsByClass(stream.Measure):
+        current = measure.timeSignature or current
+        active_time_sig[id(measure)] = current or first_time_sig
+    index: Dict[int, Tuple[float, float]] = {}
+    for number, measure in _measures_by_number(part).items():
+        time_sig = active_time_sig[id(measure)]
+        beat_length = time_sig.beatDuration.quarterLength if time_sig else 1.0
+        index[number] = (measure.getOffsetBySite(part), beat_length)
+    return index
+
+
+def _measure_offset(measure_index: Dict[int, Tuple[float, float]], measure_number: int, beat: float) -> float:
+    if measure_number not in measure_index:
         raise NuggetExtractError(f"Measure {measure_number} not found")
-    
-    # If using measure(number), it might return the measure itself (if unique) 
-    # or a stream containing it? usually it returns the measure object if unique.
-    # But if there are multiple parts merged, measure() on the PART should be fine.
-    
-    # Get time signature from measure or part
-    # We need to recurse if not found immediately
-    time_sig = measure.timeSignature
-    if not time_sig:
-        time_sig = part.recurse().getElementsByClass("TimeSignature").first()
-    
-    beat_length = time_sig.beatDuration.quarterLength if time_sig else 1.0
-    
-    # Calculate offset
-    # measure.offset is global offset
-    return float(measure.offset + (beat - 1.0) * beat_length)
-
-
-def _offset_to_seconds(offset: float, boundaries: List[Tuple[float, Optional[float], float]]) -> float:
-    seconds = 0.0
-    remaining = offset
-    for start, end, tempo in boundaries:
-        if remaining <= 0:
-            break
-        # Calculate duration of this tempo segment in quarter lengths
-        segment_duration = (end if end is not None else start + remaining + 1000) - start
-        
-        # How much of our 'remaining' offset falls into this segment?
-        # We need to locate 'offset' relative to 'start'.
-        # Actually logic is: calculate time from 0 to 'offset'.
-        
-        # Simpler logic:
-        # Iterate segments.
-        # Overlap = overlap between [0, offset] and [start, end]
-        current_segment_end = end if end is not None else float("inf")
-        
-        # Overlap interval
-        seg_start = start
-        seg_end = min(current_segment_end, offset)
-        
-        if seg_end > seg_start:
-            quarter_length = seg_end - seg_start
-            seconds += quarter_length * (60.0 / tempo)
-            
+    measure_offset, beat_length = measure_index[measure_number]
+    return float(measure_offset + (beat - 1.0) * beat_length)
+
+
+@dataclass
+class _SecondsMap:
+    # Segment i runs at qpms[i] from starts[i] to ends[i] (None = open-ended);
+    # seconds_before[i] is the time elapsed when segment i starts.
+    starts: List[float]
+    ends: List[Optional[float]]
+    qpms: List[float]
+    seconds_before: List[float]
+
+
+def _seconds_map(boundaries: List[Tuple[float, Optional[float], float]]) -> _SecondsMap:
+    # Boundaries tile the score back to back, so every segment before the
+    # one containing an offset counts in full; sum those once up front.
+    seconds_before = [0.0]
+    for start, end, qpm in boundaries[:-1]:
+        elapsed = seconds_before[-1]
+        if end is not None and end > start:
+            elapsed += (end - start) * (60.0 / qpm)
+        seconds_before.append(elapsed)
+    return _SecondsMap(
+        starts=[start for start, _, _ in boundaries],
+        ends=[end for _, end, _ in boundaries],
+        qpms=[qpm for _, _, qpm in boundaries],
+        seconds_before=seconds_before,
+    )
+
+
+def _offset_to_seconds(offset: float, seconds_map: _SecondsMap) -> float:
+    if offset <= 0:
+        return 0.0
+    # Last segment starting before the offset
+    index = bisect_left(seconds_map.starts, offset) - 1
+    if index < 0:
+        return 0.0
+    start = seconds_map.starts[index]
+    end = seconds_map.ends[index]
+    seconds = seconds_map.seconds_before[index]
+    seg_end = min(end if end is not None else float("inf"), offset)
+    if seg_end > start:
+        seconds += (seg_end - start) * (60.0 / seconds_map.qpms[index])
     return seconds
 
 
+def _start_time_index(notes: List[Dict[str, Any]]) -> Tuple[List[float], List[int]]:
+    # Note positions ordered by startTime, so each window is found by bisection
+    # instead of scanning every note of the track.
+    order = sorted(range(len(notes)), key=lambda i: notes[i]["startTime"])
+    return [notes[i]["startTime"] for i in order], order
+
+
+def _notes_in_window(
+    notes: List[Dict[str, Any]],
+    index: Tuple[List[float], List[int]],
+    start_seconds: float,
+    end_seconds: float,
+) -> List[Dict[str, Any]]:
+    starts, order = index
+    lo = bisect_left(starts, start_seconds)
+    hi = bisect_left(starts, end_seconds)
+    # Restore source order for notes that share a window.
+    return [notes[i] for i in sorted(order[lo:hi])]
+
+
+@dataclass
+class _Extraction:
+    # Everything a window lookup needs, built once per extraction call
+    seconds_map: _SecondsMap
+    measure_index: Dict[int, Tuple[float, float]]
+    tempo_marks: List[Tuple[float, float]]
+    time_signature_marks: List[Tuple[float, int, int]]
+    parts_by_track: Dict[str, stream.Part]
+    context_by_track: Dict[str, _ContextIndex]
+    measures_by_track: Dict[str, _MeasureTable]
+    note_index: Dict[str, Tuple[List[float], List[int]]]
+
+
+def _prepare_extraction(
+    score: stream.Score,
+    combined_part: stream.Part,
+    parts_by_track: Optional[Dict[str, stream.Part]],
+    note_sequences: Dict[str, Dict[str, Any]],
+) -> _Extraction:
+    parts_by_track = parts_by_track or {}
+    return _Extraction(
+        seconds_map=_seconds_map(_tempo_boundaries(score)),
+        measure_index=_measure_index(combined_part),
+        # Marks don't change between windows; collect them once
+        tempo_marks=_tempo_marks(score),
+        time_signature_marks=_time_signature_marks(combined_part),
+        parts_by_track=parts_by_track,
+        context_by_track={track_name: _context_index(part) for track_name, part in parts_by_track.items()},
+        measures_by_track={track_name: _measure_table(part) for track_name, part in parts_by_track.items()},
+        note_index={
+            track_name: _start_time_index(ns["notes"])
+            for track_name, ns in note_sequences.items()
+        },
+    )
+
+
 def extract_nuggets(
     score: stream.Score,
     combined_part: stream.Part,
@@ -374,8 +491,7 @@ def extract_nuggets(
     grid: float = 0.25,
     chord_cap: Optional[int] = None,
 ) -> None:
-    boundaries = _tempo_boundaries(score)
-    parts_by_track = parts_by_track or {}
+    extraction = _prepare_extraction(score, combined_part, parts_by_track, note_sequences)
     metadata = metadata or {}
     
     # Create nuggets directory
@@ -396,15 +512,21 @@ def extract_nuggets(
         end_b = loc.get("endBeat", 1) if "endBeat" in loc else loc["end"].get("beat", 1)
 
         try:
-            start_offset = _measure_offset(combined_part, int(start_m), float(start_b))
-            end_offset = _measure_offset(combined_part, int(end_m), float(end_b))
+            start_offset = _measure_offset(extraction.measure_index, int(start_m), float(start_b))
+            end_offset = _measure_offset(extraction.measure_index, int(end_m), float(end_b))
             
-            start_seconds = _offset_to_seconds(start_offset, boundaries)
-            end_seconds = _offset_to_seconds(end_offset, boundaries)
+            start_seconds = _offset_to_seconds(start_offset, extraction.seconds_map)
+            end_seconds = _offset_to_seconds(end_offset, extraction.seconds_map)
             
         except Exception as e:
             print(f"Skipping nugget {nugget_id}: {e}")
             continue
+
+        # Tempo and meter context only depend on the window, not the track.
+        tempos = _tempos_for_slice(extraction.tempo_marks, extraction.seconds_map, start_offset, end_offset)
+        time_signatures = _time_signatures_for_slice(
+            extraction.time_signature_marks, extraction.seconds_map, start_offset, end_offset
+        )
             
         # Extract for each track
         for track_name, ns in note_sequences.items():
@@ -415,20 +537,20 @@ def extract_nuggets(
             filename = f"{nugget_id}{suffix}.ns.json"
             
             # Slice notes
+            # Usually we want notes *belonging* to this section.
+            # "Starts within" is safest for melody. "Overlaps" can catch tails of previous chords.
+            # Let's use: Starts >= start_seconds AND Starts < end_seconds
             sliced_notes = []
-            for note in ns["notes"]:
-                # Check intersection or containment
-                # Simple logic: Note starts within window? 
-                # Or Note overlaps window?
-                # Usually we want notes *belonging* to this section.
-                # "Starts within" is safest for melody. "Overlaps" can catch tails of previous chords.
-                # Let's use: Starts >= start_seconds AND Starts < end_seconds
-                if start_seconds <= note["startTime"] < end_seconds:
-                    new_note = copy.deepcopy(note)
-                    # Shift to 0
-                    new_note["startTime"] -= start_seconds
-                    new_note["endTime"] -= start_seconds
-                    sliced_notes.append(new_note)
+            for note in _notes_in_window(ns["notes"], extraction.note_index[track_name], start_seconds, end_seconds):
+                # Notes hold only scalars, so a shallow rebuild is a full copy
+                sliced_notes.append(
+                    {
+                        **note,
+                        # Shift to 0
+                        "startTime": note["startTime"] - start_seconds,
+                        "endTime": note["endTime"] - start_seconds,
+                    }
+                )
             
             # Create extracted NS
             # Duration should cover last note end if notes extend beyond slice window.
@@ -438,10 +560,6 @@ def extract_nuggets(
                 if max_note_end > total_duration:
                     total_duration = max_note_end
             
-            tempos = _tempos_for_slice(score, boundaries, start_offset, end_offset)
-            time_signatures = _time_signatures_for_slice(combined_part, boundaries, start_offset, end_offset)
-
-            import json
             extracted_ns = {
                 "notes": sliced_notes,
                 "totalTime": total_duration,
@@ -449,12 +567,17 @@ def extract_nuggets(
                 "timeSignatures": time_signatures
             }
             
-            with open(nuggets_dir / filename, 'w') as f:
-                json.dump(extracted_ns, f, indent=2)
+            write_json(nuggets_dir / filename, extracted_ns)
 
-            part = parts_by_track.get(track_name)
+            part = extraction.parts_by_track.get(track_name)
             if part is not None:
-                sliced_part = _slice_part_by_offset(part, start_offset, end_offset)
+                sliced_part = _slice_part_by_offset(
+                    part,
+                    start_offset,
+                    end_offset,
+                    extraction.context_by_track[track_name],
+                    extraction.measures_by_track[track_name],
+                )
                 xml_filename = f"{nugget_id}{suffix}.xml"
                 xml_path = nuggets_dir / xml_filename
                 _write_musicxml(sliced_part, xml_path)
@@ -490,8 +613,7 @@ def extract_assemblies(
     For each assembly, find the start of the first nugget and end of the last nugget,
     then extract notes from that range.
     """
-    boundaries = _tempo_boundaries(score)
-    parts_by_track = parts_by_track or {}
+    extraction = _prepare_extraction(score, combined_part, parts_by_track, note_sequences)
     metadata = metadata or {}
     
     # Create assemblies directory
@@ -549,15 +671,20 @@ def extract_assemblies(
         end_m, end_b = get_end(last_loc)
         
         try:
-            start_offset = _measure_offset(combined_part, start_m, start_b)
-            end_offset = _measure_offset(combined_part, end_m, end_b)
+            start_offset = _measure_offset(extraction.measure_index, start_m, start_b)
+            end_offset = _measure_offset(extraction.measure_index, end_m, end_b)
             
-            start_seconds = _offset_to_seconds(start_offset, boundaries)
-            end_seconds = _offset_to_seconds(end_offset, boundaries)
+            start_seconds = _offset_to_seconds(start_offset, extraction.seconds_map)
+            end_seconds = _offset_to_seconds(end_offset, extraction.seconds_map)
             
         except Exception as e:
             print(f"Skipping assembly {assembly_id}: {e}")
             continue
+
+        tempos = _tempos_for_slice(extraction.tempo_marks, extraction.seconds_map, start_offset, end_offset)
+        time_signatures = _time_signatures_for_slice(
+            extraction.time_signature_marks, extraction.seconds_map, start_offset, end_offset
+        )
         
         # Extract for each track
         for track_name, ns in note_sequences.items():
@@ -566,12 +693,14 @@ def extract_assemblies(
             
             # Slice notes
             sliced_notes = []
-            for note in ns["notes"]:
-                if start_seconds <= note["startTime"] < end_seconds:
-                    new_note = copy.deepcopy(note)
-                    new_note["startTime"] -= start_seconds
-                    new_note["endTime"] -= start_seconds
-                    sliced_notes.append(new_note)
+            for note in _notes_in_window(ns["notes"], extraction.note_index[track_name], start_seconds, end_seconds):
+                sliced_notes.append(
+                    {
+                        **note,
+                        "startTime": note["startTime"] - start_seconds,
+                        "endTime": note["endTime"] - start_seconds,
+                    }
+                )
             
             total_duration = end_seconds - start_seconds
             if sliced_notes:
@@ -579,10 +708,6 @@ def extract_assemblies(
                 if max_note_end > total_duration:
                     total_duration = max_note_end
             
-            tempos = _tempos_for_slice(score, boundaries, start_offset, end_offset)
-            time_signatures = _time_signatures_for_slice(combined_part, boundaries, start_offset, end_offset)
-
-            import json
             extracted_ns = {
                 "notes": sliced_notes,
                 "totalTime": total_duration,
@@ -590,12 +715,17 @@ def extract_assemblies(
                 "timeSignatures": time_signatures
             }
             
-            with open(assemblies_dir / filename, 'w') as f:
-                json.dump(extracted_ns, f, indent=2)
+            write_json(assemblies_dir / filename, extracted_ns)
 
-            part = parts_by_track.get(track_name)
+            part = extraction.parts_by_track.get(track_name)
             if part is not None:
-                sliced_part = _slice_part_by_offset(part, start_offset, end_offset)
+                sliced_part = _slice_part_by_offset(
+                    part,
+                    start_offset,
+                    end_offset,
+                    extraction.context_by_track[track_name],
+                    extraction.measures_by_track[track_name],
+                )
                 xml_filename = f"{assembly_id}{suffix}.xml"
                 xml_path = assemblies_dir / xml_filename
                 _write_musicxml(sliced_part, xml_path)
@@ -5,7 +5,7 @@ from pathlib import Path
 
 from music21 import converter, instrument, note, stream, tempo
 
-from tune_pipeline.extract import extract_xml
+from tune_pipeline.extract import extract_xml, remove_ghost_notes
 
 
 def _write_mxl(xml_path: Path, mxl_path: Path) -> None:
@@ -57,3 +57,51 @@ def test_extract_removes_ghost_notes(tmp_path: Path) -> None:
     notes = list(cleaned_score.recurse().notes)
     assert len(notes) == 1
     assert notes[0].pitch.nameWithOctave == "D4"
+
+
+def test_remove_ghost_notes_uses_tempo_in_effect() -> None:
+    score = stream.Score()
+    part = stream.Part()
+    part.insert(0, tempo.MetronomeMark(number=60))
+    measure1 = stream.Measure(number=1)
+    measure1.append([note.Note("C4", quarterLength=0.25), note.Note("D4", quarterLength=3.75)])
+    measure2 = stream.Measure(number=2)
+    measure2.insert(0, tempo.MetronomeMark(number=240))
+    measure2.append([note.Note("E4", quarterLength=0.25), note.Note("F4", quarterLength=3.75)])
+    part.append([measure1, measure2])
+    score.insert(0, part)
+
+    removed, total = remove_ghost_notes(score)
+
+    assert (removed, total) == (1, 4)
+    assert [n.pitch.nameWithOctave for n in score.recurse().notes] == ["C4", "D4", "F4"]
+
+
+def test_remove_ghost_notes_sees_score_level_tempo() -> None:
+    score = stream.Score()
+    score.insert(0, tempo.MetronomeMark(number=60))
+    part = stream.Part()
+    part.append([note.Note("C4", quarterLength=0.25), note.Note("D4", quarterLength=3.75)])
+    score.insert(0, part)
+
+    removed, total = remove_ghost_notes(score, threshold_seconds=0.2)
+
+    # At 60 qpm the sixteenth lasts 0.25 s, so it is not a ghost note
+    assert (removed, total) == (0, 2)
+    assert [n.pitch.nameWithOctave for n in score.recurse().notes] == ["C4", "D4"]
+
+
+def test_remove_ghost_notes_prefers_measure_mark_at_same_offset() -> None:
+    score = stream.Score()
+    part = stream.Part()
+    measure = stream.Measure(number=1)
+    measure.insert(0, tempo.MetronomeMark(number=60))
+    measure.append([note.Note("C4", quarterLength=0.25), note.Note("D4", quarterLength=3.75)])
+    part.append(measure)
+    # Same offset as the measure's mark, but shallower, so getContextByClass ignores it
+    part.insert(0, tempo.MetronomeMark(number=240))
+    score.insert(0, part)
+
+    removed, total = remove_ghost_notes(score, threshold_seconds=0.2)
+
+    assert (removed, total) == (0, 2)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tune_pipeline import io as pipeline_io
+from tune_pipeline.io import read_json, write_json
+
+
+def _select_backend(monkeypatch: pytest.MonkeyPatch, use_orjson: bool) -> None:
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(pipeline_io, "orjson", None)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_write_json_matches_stdlib_layout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_orjson: bool
+) -> None:
+    _select_backend(monkeypatch, use_orjson)
+    # ASCII text, finite floats without exponents: here both backends agree byte for byte
+    payload = {
+        "totalTime": 4.5,
+        "notes": [{"velocity": 0.7874015748031497, "pitch": 60, "startTime": 0.0, "endTime": 0.25}],
+        "tempos": [],
+        "timeSignatures": [{"time": 0.0, "numerator": 3, "denominator": 4}],
+    }
+    path = tmp_path / "nested" / "tune.ns.json"
+    write_json(path, payload)
+
+    assert path.read_text(encoding="utf-8") == json.dumps(payload, indent=2, sort_keys=True) + "\n"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_write_json_round_trips_values(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_orjson: bool
+) -> None:
+    _select_backend(monkeypatch, use_orjson)
+    payload = {"label": "Gymnopédie – ré", "values": [1e-05, 1e-07, 1e20, 1.5e300, -0.0, 3]}
+    path = tmp_path / "teacher.json"
+    write_json(path, payload)
+
+    assert read_json(path) == payload
+    # Whichever backend wrote it, the file is valid UTF-8 JSON for any reader
+    assert json.loads(path.read_text(encoding="utf-8")) == payload
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_write_json_accepts_numpy_values(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_orjson: bool
+) -> None:
+    np = pytest.importorskip("numpy")
+    _select_backend(monkeypatch, use_orjson)
+    payload = {"qpms": np.array([60.0, 120.0]), "count": np.int64(3), "time": np.float64(1.5)}
+    path = tmp_path / "tune.ns.json"
+    write_json(path, payload)
+
+    assert read_json(path) == {"qpms": [60.0, 120.0], "count": 3, "time": 1.5}
+
+
+def test_write_json_rejects_unknown_objects(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pipeline_io, "orjson", None)
+
+    with pytest.raises(TypeError, match="not JSON serializable"):
+        write_json(tmp_path / "teacher.json", {"value": object()})
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_read_json_decodes_utf8(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, use_orjson: bool) -> None:
+    _select_backend(monkeypatch, use_orjson)
+    path = tmp_path / "teacher.json"
+    path.write_text('{"title": "Gymnop\u00e9die", "nuggets": [{"id": "n1", "startBeat": 1.5}]}', encoding="utf-8")
+
+    assert read_json(path) == {"title": "Gymnopédie", "nuggets": [{"id": "n1", "startBeat": 1.5}]}
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from tune_pipeline import mxl_unpack
+from tune_pipeline.mxl_unpack import unpack_mxl
+
+
+def _write_archive(mxl_path: Path, payload: bytes) -> None:
+    container = (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+        "<container version=\"1.0\" xmlns=\"urn:oasis:names:tc:opendocument:xmlns:container\">\n"
+        "  <rootfiles>\n"
+        "    <rootfile full-path=\"score.xml\" media-type=\"application/vnd.recordare.musicxml+xml\"/>\n"
+        "  </rootfiles>\n"
+        "</container>\n"
+    )
+    with zipfile.ZipFile(mxl_path, "w") as zf:
+        zf.writestr("META-INF/container.xml", container)
+        zf.writestr("score.xml", payload)
+
+
+def test_unpack_mxl_writes_rootfile(tmp_path: Path) -> None:
+    mxl_path = tmp_path / "tune.mxl"
+    _write_archive(mxl_path, b"<score-partwise/>")
+
+    xml_path = unpack_mxl(mxl_path, tmp_path / "tune.xml")
+
+    assert xml_path.read_bytes() == b"<score-partwise/>"
+
+
+def test_unpack_mxl_removes_partial_file_when_copy_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    mxl_path = tmp_path / "tune.mxl"
+    _write_archive(mxl_path, b"<score-partwise/>")
+
+    def failing_copy(source, target, length):
+        target.write(b"<score-")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mxl_unpack.shutil, "copyfileobj", failing_copy)
+    with pytest.raises(OSError, match="disk full"):
+        unpack_mxl(mxl_path, tmp_path / "tune.xml")
+
+    assert not (tmp_path / "tune.xml").exists()
+
+
+def test_unpack_mxl_does_not_unlink_when_target_cannot_be_opened(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    mxl_path = tmp_path / "tune.mxl"
+    _write_archive(mxl_path, b"<score-partwise/>")
+    unlinked: list[Path] = []
+
+    def refuse_open(self, *args, **kwargs):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(Path, "open", refuse_open)
+    monkeypatch.setattr(Path, "unlink", lambda self, missing_ok=False: unlinked.append(self))
+    with pytest.raises(PermissionError):
+        unpack_mxl(mxl_path, tmp_path / "tune.xml")
+
+    assert unlinked == []
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import pytest
+from music21 import meter, note, stream
+
+from tune_pipeline.nuggets_extract import (
+    NuggetExtractError,
+    _measure_index,
+    _measure_offset,
+    _measure_table,
+    _notes_in_window,
+    _offset_to_seconds,
+    _seconds_map,
+    _slice_part_by_offset,
+    _slice_range,
+    _start_time_index,
+)
+
+
+def _note(pitch: int, start: float) -> dict:
+    return {"pitch": pitch, "startTime": start, "endTime": start + 0.5, "velocity": 0.8}
+
+
+def test_notes_in_window_matches_linear_scan() -> None:
+    notes = [_note(60, 0.0), _note(64, 0.0), _note(62, 0.5), _note(65, 1.0), _note(67, 1.5)]
+    index = _start_time_index(notes)
+
+    for start, end in [(0.0, 1.0), (0.25, 1.5), (1.0, 1.0), (2.0, 3.0), (-1.0, 10.0)]:
+        expected = [n for n in notes if start <= n["startTime"] < end]
+        assert _notes_in_window(notes, index, start, end) == expected
+
+
+def test_notes_in_window_keeps_source_order_for_unsorted_input() -> None:
+    notes = [_note(67, 1.5), _note(60, 0.0), _note(65, 1.0), _note(62, 0.5)]
+    index = _start_time_index(notes)
+
+    selected = _notes_in_window(notes, index, 0.5, 2.0)
+    assert [n["pitch"] for n in selected] == [67, 65, 62]
+
+
+def test_offset_to_seconds_accumulates_tempo_segments() -> None:
+    # 4 quarters at 60 qpm, then 4 at 120 qpm; the score ends at offset 8
+    seconds_map = _seconds_map([(0.0, 4.0, 60.0), (4.0, 8.0, 120.0)])
+
+    assert _offset_to_seconds(0.0, seconds_map) == 0.0
+    assert _offset_to_seconds(2.0, seconds_map) == 2.0
+    assert _offset_to_seconds(4.0, seconds_map) == 4.0
+    assert _offset_to_seconds(6.0, seconds_map) == 5.0
+    assert _offset_to_seconds(10.0, seconds_map) == 6.0
+
+
+def test_offset_to_seconds_without_marks_is_open_ended() -> None:
+    seconds_map = _seconds_map([(0.0, None, 120.0)])
+
+    assert _offset_to_seconds(-1.0, seconds_map) == 0.0
+    assert _offset_to_seconds(300.0, seconds_map) == 150.0
+
+
+def test_measure_offset_uses_time_signature_in_effect() -> None:
+    part = stream.Part()
+    for number in range(1, 5):
+        measure = stream.Measure(number=number)
+        if number == 1:
+            measure.insert(0, meter.TimeSignature("2/4"))
+        if number == 3:
+            measure.insert(0, meter.TimeSignature("6/8"))
+        measure.append(note.Rest(quarterLength=2 if number < 3 else 3))
+        part.append(measure)
+    measure_index = _measure_index(part)
+
+    assert _measure_offset(measure_index, 2, 2.0) == 3.0
+    # Measure 4 has no signature of its own; beats are dotted quarters from 6/8
+    assert _measure_offset(measure_index, 4, 2.0) == 8.5
+    with pytest.raises(NuggetExtractError):
+        _measure_offset(measure_index, 5, 1.0)
+
+
+def test_slice_range_keeps_last_mark_before_window() -> None:
+    marks = [(0.0, 60.0), (4.0, 90.0), (4.0, 100.0), (8.0, 120.0), (12.0, 80.0)]
+
+    for start, end in [(0.0, 4.0), (5.0, 9.0), (4.0, 12.0), (6.0, 6.0), (20.0, 24.0)]:
+        last_before = [m for m in marks if m[0] < start][-1:]
+        expected = last_before + [m for m in marks if start <= m[0] < end]
+        assert marks[_slice_range(marks, start, end)] == expected
+
+
+def test_slice_part_keeps_every_overlapping_measure() -> None:
+    part = stream.Part()
+    # The first measure runs past the next two; slices inside it must still include it
+    for offset, length in [(0.0, 8.0), (4.0, 2.0), (6.0, 2.0), (8.0, 4.0)]:
+        measure = stream.Measure()
+        measure.append(note.Rest(quarterLength=length))
+        part.insert(offset, measure)
+    table = _measure_table(part)
+
+    for start, end, expected in [(0.0, 4.0, 1), (6.5, 7.0, 2), (7.0, 9.0, 3), (12.0, 16.0, 0)]:
+        sliced = _slice_part_by_offset(part, start, end, measure_table=table)
+        assert len(sliced.getElementsByClass(stream.Measure)) == expected
@@ -3,9 +3,11 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+import pytest
 from music21 import instrument, note, stream
 
-from tune_pipeline.cli import build_tune
+from tune_pipeline.cli import _score_from_note_sequence, build_tune
+from tune_pipeline.validate_teacher import TeacherValidationError
 
 
 def _make_score() -> stream.Score:
@@ -65,3 +67,81 @@ def test_build_pipeline(tmp_path: Path) -> None:
     assert "N1" in resolved["nuggets"]
     notes = json.loads((tune_folder / "tune.ns.json").read_text(encoding="utf-8"))["notes"]
     assert notes == sorted(notes, key=lambda n: (n["startTime"], n["pitch"], n["endTime"]))
+
+
+def _make_two_staff_score() -> stream.Score:
+    score = stream.Score()
+    for pitches in (["C5", "D5"], ["C3", "D3"]):
+        part = stream.Part()
+        part.insert(0, instrument.Piano())
+        for number, pitch in enumerate(pitches, start=1):
+            measure = stream.Measure(number=number)
+            measure.append(note.Note(pitch, quarterLength=4))
+            part.append(measure)
+        score.insert(0, part)
+    return score
+
+
+def _write_hand_xml_tune(tmp_path: Path, emit_hand_xml: object) -> Path:
+    tune_folder = tmp_path / "gymnopdie"
+    tune_folder.mkdir()
+    _make_two_staff_score().write("musicxml", fp=str(tune_folder / "tune.xml"))
+    teacher = {
+        "schemaVersion": "nuggets-teacher.v1",
+        "pipelineSettings": {
+            "handSplitPolicy": {"mode": "byStaff"},
+            "staffToHandDefault": {"1": "RH", "2": "LH"},
+            "emitHandXml": emit_hand_xml,
+        },
+        "nuggets": [
+            {
+                "id": "N1",
+                "label": "Intro",
+                "location": {"startMeasure": 1, "startBeat": 1, "endMeasure": 2, "endBeat": 1},
+            }
+        ],
+    }
+    (tune_folder / "teacher.json").write_text(json.dumps(teacher), encoding="utf-8")
+    return tune_folder
+
+
+def test_build_pipeline_can_skip_hand_xml(tmp_path: Path) -> None:
+    tune_folder = _write_hand_xml_tune(tmp_path, False)
+
+    build_tune(tune_folder)
+
+    output_dir = tune_folder / "output"
+    assert (output_dir / "tune.rh.ns.json").exists()
+    assert (output_dir / "tune.lh.ns.json").exists()
+    assert not (output_dir / "tune.rh.xml").exists()
+    assert not (output_dir / "tune.lh.xml").exists()
+
+
+@pytest.mark.parametrize("value", ["false", 0, None])
+def test_build_pipeline_rejects_non_bool_emit_hand_xml(tmp_path: Path, value: object) -> None:
+    tune_folder = _write_hand_xml_tune(tmp_path, value)
+    previous_output = tune_folder / "output" / "tune.rh.xml"
+    previous_output.parent.mkdir()
+    previous_output.write_text("<score-partwise/>", encoding="utf-8")
+
+    with pytest.raises(TeacherValidationError, match="emitHandXml"):
+        build_tune(tune_folder)
+
+    # Rejected before the output folder is cleaned, so the last build survives
+    assert previous_output.read_text(encoding="utf-8") == "<score-partwise/>"
+
+
+def test_score_from_note_sequence_follows_tempo_changes() -> None:
+    ns = {
+        "notes": [
+            {"pitch": 60, "startTime": 0.0, "endTime": 1.0, "velocity": 0.8},
+            {"pitch": 62, "startTime": 2.0, "endTime": 2.5, "velocity": 0.8},
+            {"pitch": 64, "startTime": 3.0, "endTime": 3.25, "velocity": 0.8},
+        ],
+        "tempos": [{"time": 0.0, "qpm": 60.0}, {"time": 2.0, "qpm": 120.0}],
+        "timeSignatures": [],
+    }
+    score = _score_from_note_sequence(ns, {})
+
+    notes = [(n.pitch.midi, n.getOffsetInHierarchy(score), n.quarterLength) for n in score.flatten().notes]
+    assert notes == [(60, 0.0, 1.0), (62, 2.0, 1.0), (64, 4.0, 0.5)]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from music21 import note, stream
+
+from tune_pipeline.xml_simplify import _merge_overlapping_notes_only
+
+
+def _part(*notes: tuple[float, str, float]) -> stream.Part:
+    part = stream.Part()
+    for offset, name, length in notes:
+        part.insert(offset, note.Note(name, quarterLength=length))
+    return part
+
+
+def test_merge_overlapping_notes_extends_and_drops_overlaps() -> None:
+    part = _part((0.0, "C4", 1.0), (0.5, "C4", 2.0), (1.0, "C4", 0.5), (0.5, "E4", 1.0), (3.0, "C4", 1.0))
+
+    merged = _merge_overlapping_notes_only(part)
+
+    assert [(float(n.offset), n.nameWithOctave, float(n.quarterLength)) for n in merged.notes] == [
+        (0.0, "C4", 2.5),
+        (0.5, "E4", 1.0),
+        (3.0, "C4", 1.0),
+    ]
+
+
+def test_merge_overlapping_notes_inside_measures() -> None:
+    measure = stream.Measure(number=1)
+    for offset, name, length in [(0.0, "C4", 1.0), (0.5, "C4", 0.25), (2.0, "E4", 1.0)]:
+        measure.insert(offset, note.Note(name, quarterLength=length))
+    part = stream.Part()
+    part.append(measure)
+
+    merged = _merge_overlapping_notes_only(part)
+
+    assert [(float(n.offset), n.nameWithOctave, float(n.quarterLength)) for n in merged.recurse().notes] == [
+        (0.0, "C4", 1.0),
+        (2.0, "E4", 1.0),
+    ]
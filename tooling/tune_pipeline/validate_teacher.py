@@ -13,6 +13,9 @@ def validate_teacher(payload: Dict[str, Any]) -> None:
         raise TeacherValidationError(f"schemaVersion must be one of {valid_schemas}")
     if "pipelineSettings" not in payload:
         raise TeacherValidationError("Missing pipelineSettings")
+    settings = payload["pipelineSettings"]
+    if isinstance(settings, dict) and not isinstance(settings.get("emitHandXml", True), bool):
+        raise TeacherValidationError("pipelineSettings.emitHandXml must be true or false")
     nuggets = payload.get("nuggets")
     if not isinstance(nuggets, list) or not nuggets:
         raise TeacherValidationError("Missing nuggets list")
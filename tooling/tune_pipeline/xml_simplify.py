@@ -58,7 +58,7 @@ def _copy_part_headers(
                 offset = float(elem.offset)
             target.insert(_quantize_value(offset, grid), copy.deepcopy(elem))
 
-def _merge_overlapping_notes_only(part: stream.Part) -> None:
+def _merge_overlapping_notes_only(part: stream.Part) -> stream.Part:
     overlap_eps = 1e-6
     by_pitch: dict[int, list[note.Note]] = {}
     for n in part.recurse().notes:
@@ -66,6 +66,7 @@ def _merge_overlapping_notes_only(part: stream.Part) -> None:
             continue
         by_pitch.setdefault(int(n.pitch.midi), []).append(n)
 
+    removed: list[note.Note] = []
     for pitch_notes in by_pitch.values():
         pitch_notes.sort(key=lambda n: float(n.offset))
         current = None
@@ -79,15 +80,32 @@ def _merge_overlapping_notes_only(part: stream.Part) -> None:
                 continue
             if start < current_end - overlap_eps:
                 if end > current_end:
-                    current.duration.quarterLength = max(
-                        end - float(current.offset),
-                    )
+                    current.duration.quarterLength = end - float(current.offset)
                     current_end = end
-                part.remove(n, recurse=True)
+                removed.append(n)
             else:
                 current = n
                 current_end = end
 
+    # Notes inside measures or voices come out of their own (small) container.
+    top_level: set[int] = set()
+    for n in removed:
+        site = n.activeSite
+        if site is part:
+            top_level.add(id(n))
+        elif site is not None:
+            site.remove(n)
+    if not top_level:
+        return part
+    # Stream.remove rescans the stream per call; rebuild the part once instead.
+    merged = stream.Part()
+    merged.partName = part.partName
+    for element in part.elements:
+        if id(element) not in top_level:
+            merged.coreInsert(part.elementOffset(element), element)
+    merged.coreElementsChanged()
+    return merged
+
 
 def _spell_pitch_sharps(midi_value: int) -> pitch.Pitch:
     p = pitch.Pitch()
@@ -133,7 +151,8 @@ def _events_from_part(
     part: stream.Part,
     grid: float,
 ) -> list[list[int]]:
-    buckets: dict[float, list[int]] = {}
+    # Key by int grid index (raw offset without a grid) so equal slots compare exactly
+    buckets: dict[float | int, list[int]] = {}
     for element in part.recurse().notes:
         if isinstance(element, note.Note):
             pitches = [int(element.pitch.midi)]
@@ -141,8 +160,9 @@ def _events_from_part(
             pitches = [int(p.midi) for p in element.pitches]
         else:
             continue
-        offset = _quantize_value(float(element.offset), grid)
-        buckets.setdefault(offset, []).extend(pitches)
+        offset = float(element.offset)
+        slot = round(offset / grid) if grid > 0 else offset
+        buckets.setdefault(slot, []).extend(pitches)
     return [buckets[key] for key in sorted(buckets.keys())]
 
 
@@ -154,13 +174,11 @@ def simplify_part_for_dsp2(
     chord_cap: Optional[int],
     chord_keep: str,
 ) -> stream.Part:
-    temp_score = stream.Score()
-    temp_score.insert(0, copy.deepcopy(part))
+    # expandRepeats already returns copies; only copy ourselves when it can't run
     try:
-        temp_score = temp_score.expandRepeats()
+        part_copy = part.expandRepeats()
     except Exception:
-        pass
-    part_copy = temp_score.parts[0]
+        part_copy = copy.deepcopy(part)
     try:
         part_copy.stripTies(inPlace=True)
     except Exception:
@@ -211,7 +229,7 @@ def _clean_part_for_dsp(
     new_part = stream.Part()
     _copy_part_headers(part, new_part, grid)
 
-    for element in part.flat.notesAndRests:
+    for element in part.flatten().notesAndRests:
         if _is_grace(element):
             continue
         offset = _quantize_value(float(element.offset), grid)
@@ -232,5 +250,4 @@ def _clean_part_for_dsp(
         new_elem.duration.quarterLength = duration
         new_part.insert(offset, new_elem)
 
-    _merge_overlapping_notes_only(new_part)
-    return new_part
+    return _merge_overlapping_notes_only(new_part)